@@ -5,18 +5,14 @@ Runs FastMCP server for LLM agent integration.
 PerplexitySearch lifecycle handled via lifespan in mcp_tools.
 """
 
-import os
-
 from src.mcp_tools import mcp
+from src.settings import SETTINGS
 
-# Server configuration from environment
-HOST = os.getenv("MCP_HOST", "0.0.0.0")
-PORT = int(os.getenv("MCP_PORT", "8001"))
 
 def run():
     """Entry point for script."""
-    print(f"Starting Perplexity MCP Server on {HOST}:{PORT}...")
-    mcp.run(transport="streamable-http", host=HOST, port=PORT)
+    print(f"Starting Perplexity MCP Server on {SETTINGS.host}:{SETTINGS.port}...")
+    mcp.run(transport="streamable-http", host=SETTINGS.host, port=SETTINGS.port)
 
 if __name__ == "__main__":
     run()
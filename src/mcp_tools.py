@@ -5,159 +5,203 @@ These are thin wrappers around PerplexitySearch methods.
 All business logic lives in PerplexitySearch.
 """
 
-import os
+import hmac
+import inspect
+from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 
 import mcp.types as mcp_types
-from fastmcp import FastMCP
+from fastmcp import Context, FastMCP
 from fastmcp.exceptions import ToolError
-from fastmcp.server.dependencies import get_http_headers
+from fastmcp.server.dependencies import get_http_request
 from fastmcp.server.middleware import Middleware, MiddlewareContext
 
 from src.perplexity_search import PerplexitySearch
+from src.settings import SETTINGS
 
-# Global reference for tools to access
-_search: PerplexitySearch | None = None
 
-def get_search() -> PerplexitySearch:
-    """Get the PerplexitySearch instance."""
-    if _search is None:
-        raise RuntimeError("PerplexitySearch not initialized")
-    return _search
+@dataclass
+class AppContext:
+    """Typed lifespan context shared by all tools."""
+
+    search: PerplexitySearch
+
+def get_search(ctx: Context) -> PerplexitySearch:
+    """Get the PerplexitySearch instance from the lifespan context."""
+    request_context = ctx.request_context
+    if request_context is None:
+        raise RuntimeError("PerplexitySearch not available outside of a request")
+    app: AppContext = request_context.lifespan_context
+    return app.search
 
 @asynccontextmanager
-async def lifespan(app):
+async def lifespan(app) -> AsyncIterator[AppContext]:
     """
     Lifespan context manager for FastMCP.
 
     Handles async startup and shutdown of PerplexitySearch.
+    Runs once per server process, so every session shares the same
+    PerplexitySearch and its connection pool. The client is created at startup
+    so the first tool call doesn't pay for it; PerplexitySearch.close() remains
+    the teardown path.
     """
-    global _search
-    _search = PerplexitySearch()
+    search = PerplexitySearch()
+    await search.connect()
 
     try:
-        yield
+        yield AppContext(search=search)
     finally:
-        await _search.close()
-        _search = None
+        await search.close()
         print("Server stopped.")
 
-class ArgumentSanitizerMiddleware(Middleware):
-    """
-    Strip extra/unknown fields from tool arguments before Pydantic validation.
-
-    Some MCP clients (e.g., n8n) include metadata fields like 'tool', 'id', 'toolCallId'
-    inside the arguments dict. FastMCP's strict Pydantic validation rejects these
-    unexpected fields. This middleware filters arguments to only include parameters
-    defined in the tool's JSON schema.
+class MCPGuardMiddleware(Middleware):
     """
+    Authenticate tool calls and sanitize their arguments in a single pass.
 
-    async def on_call_tool(self, context: MiddlewareContext, call_next):
-        message = context.message
-        arguments = message.arguments or {}
+    Auth: validates the Bearer token from the Authorization header. The expected
+    token is read from MCP_BEARER_TOKEN once at construction, so a misconfigured
+    server fails at startup instead of on every tool call.
 
-        # Get the tool to access its parameter schema
-        tools = await mcp._tool_manager.get_tools()
-        tool = tools.get(message.name)
-
-        if tool and arguments:
-            # Get valid parameter names from the tool's JSON schema
-            valid_params = set(tool.parameters.get("properties", {}).keys())
-            # Filter to only include valid parameters, silently dropping extras
-            cleaned_args = {k: v for k, v in arguments.items() if k in valid_params}
+    Sanitizing: some MCP clients (e.g., n8n) include metadata fields like 'tool',
+    'id', 'toolCallId' inside the arguments dict. FastMCP's strict Pydantic
+    validation rejects these unexpected fields. Arguments are filtered to only
+    include parameters defined in the tool's JSON schema. Tool schemas don't
+    change after startup, so valid parameter names are cached per tool on first use.
+    """
 
-            # Create new message with cleaned arguments
-            new_message = mcp_types.CallToolRequestParams(name=message.name, arguments=cleaned_args)
-            context = context.copy(message=new_message)
+    def __init__(self, token: str | None = None):
+        """
+        Initialize guard middleware.
+
+        Args:
+            token: Expected bearer token (defaults to MCP_BEARER_TOKEN env var)
+
+        Raises:
+            ValueError: If no token is configured
+        """
+        token = token or SETTINGS.bearer_token
+        if not token:
+            raise ValueError(
+                "Server misconfigured: MCP_BEARER_TOKEN not set. "
+                "Set MCP_BEARER_TOKEN environment variable."
+            )
+        self._expected = token.encode()
+        self._param_cache: dict[str, frozenset[str]] = {}
+
+    def _authenticate(self) -> None:
+        """Validate the Bearer token of the current HTTP request."""
+        try:
+            # Read the one header directly instead of materializing all of them
+            auth_header = get_http_request().headers.get("authorization", "")
+        except RuntimeError:
+            # Not an HTTP transport: there is no Authorization header to check
+            auth_header = ""
+
+        # removeprefix returns the same object when the prefix is absent
+        token_str = auth_header.removeprefix("Bearer ")
+        if token_str is auth_header:
+            raise ToolError("Unauthorized: Missing Bearer token")
 
-        return await call_next(context)
+        token = token_str.encode()
+        # Constant-time comparison to avoid leaking token prefix via timing
+        if not hmac.compare_digest(token, self._expected):
+            raise ToolError("Unauthorized: Invalid token")
 
-class BearerAuthMiddleware(Middleware):
-    """Validate Bearer token from Authorization header."""
+    async def _get_valid_params(self, name: str) -> frozenset[str] | None:
+        """Get valid parameter names for a tool, loading schemas on cache miss."""
+        valid_params = self._param_cache.get(name)
+        if valid_params is None:
+            tools = await mcp._tool_manager.get_tools()
+            for tool_name, tool in tools.items():
+                self._param_cache[tool_name] = frozenset(tool.parameters.get("properties", {}))
+            valid_params = self._param_cache.get(name)
+        return valid_params
 
     async def on_call_tool(self, context: MiddlewareContext, call_next):
-        headers = get_http_headers()
-        auth_header = headers.get("authorization", "")
+        # Authenticate first: cheap, and rejects bad tokens before any schema work
+        self._authenticate()
 
-        expected_token = os.getenv("MCP_BEARER_TOKEN")
-        if not expected_token:
-            raise ToolError("Server misconfigured: MCP_BEARER_TOKEN not set")
+        message = context.message
+        arguments = message.arguments
+        if not arguments:
+            return await call_next(context)
 
-        if not auth_header.startswith("Bearer "):
-            raise ToolError("Unauthorized: Missing Bearer token")
+        valid_params = await self._get_valid_params(message.name)
+        if valid_params is None or arguments.keys() <= valid_params:
+            # Unknown tool or already clean: no need to rebuild the message
+            return await call_next(context)
 
-        token = auth_header[7:]  # Remove "Bearer " prefix
-        if token != expected_token:
-            raise ToolError("Unauthorized: Invalid token")
+        # Filter to only include valid parameters, silently dropping extras
+        cleaned_args = {k: v for k, v in arguments.items() if k in valid_params}
 
-        return await call_next(context)
+        # Create new message with cleaned arguments
+        new_message = mcp_types.CallToolRequestParams(name=message.name, arguments=cleaned_args)
+        return await call_next(context.copy(message=new_message))
 
-mcp = FastMCP("Perplexity MCP Server", lifespan=lifespan)
-# Register middlewares in order: sanitize args first, then authenticate
-mcp.add_middleware(ArgumentSanitizerMiddleware())
-mcp.add_middleware(BearerAuthMiddleware())
+mcp: FastMCP[AppContext] = FastMCP("Perplexity MCP Server", lifespan=lifespan)
+mcp.add_middleware(MCPGuardMiddleware())
 
-@mcp.tool()
-async def perplexity_search(query: str) -> str:
-    """
-    Performs web search using the Perplexity Search API.
+# Tool name (matching the PerplexitySearch method) -> description shown to clients
+TOOLS = {
+    "perplexity_search": """
+        Performs web search using the Perplexity Search API.
 
-    Returns ranked search results with titles, URLs, snippets, and metadata.
-    Perfect for finding up-to-date facts, news, or specific information.
+        Returns ranked search results with titles, URLs, snippets, and metadata.
+        Perfect for finding up-to-date facts, news, or specific information.
 
-    Args:
-        query: Search query string
+        Args:
+            query: Search query string
 
-    Returns:
-        Answer text with markdown sources list appended
-    """
-    return await get_search().perplexity_search(query)
+        Returns:
+            Answer text with markdown sources list appended
+        """,
+    "perplexity_ask": """
+        Engages in a conversation using the Sonar API.
 
-@mcp.tool()
-async def perplexity_ask(query: str) -> str:
-    """
-    Engages in a conversation using the Sonar API.
+        Accepts a query and returns a chat completion response from the Perplexity model.
+        Best for answering questions with up-to-date information.
 
-    Accepts a query and returns a chat completion response from the Perplexity model.
-    Best for answering questions with up-to-date information.
+        Args:
+            query: Question to ask
 
-    Args:
-        query: Question to ask
+        Returns:
+            Answer text with markdown sources list appended
+        """,
+    "perplexity_research": """
+        Performs deep research using the Perplexity API.
 
-    Returns:
-        Answer text with markdown sources list appended
-    """
-    return await get_search().perplexity_ask(query)
+        Returns a comprehensive research response with citations.
+        Best for in-depth research requiring multiple sources.
 
-@mcp.tool()
-async def perplexity_research(query: str) -> str:
-    """
-    Performs deep research using the Perplexity API.
+        Args:
+            query: Research topic or question
 
-    Returns a comprehensive research response with citations.
-    Best for in-depth research requiring multiple sources.
+        Returns:
+            Answer text with markdown sources list appended
+        """,
+    "perplexity_reason": """
+        Performs reasoning tasks using the Perplexity API.
 
-    Args:
-        query: Research topic or question
+        Returns a well-reasoned response using the sonar-reasoning-pro model.
+        Best for complex problems requiring step-by-step reasoning.
 
-    Returns:
-        Answer text with markdown sources list appended
-    """
-    return await get_search().perplexity_research(query)
+        Args:
+            query: Problem or question requiring reasoning
 
-@mcp.tool()
-async def perplexity_reason(query: str) -> str:
-    """
-    Performs reasoning tasks using the Perplexity API.
+        Returns:
+            Answer text with markdown sources list appended
+        """,
+}
 
-    Returns a well-reasoned response using the sonar-reasoning-pro model.
-    Best for complex problems requiring step-by-step reasoning.
+def _make_tool(name: str):
+    """Create a tool function delegating to the PerplexitySearch method of the same name."""
 
-    Args:
-        query: Problem or question requiring reasoning
+    async def tool(query: str, ctx: Context) -> str:
+        return await getattr(get_search(ctx), name)(query)
 
-    Returns:
-        Answer text with markdown sources list appended
-    """
-    return await get_search().perplexity_reason(query)
+    tool.__name__ = name
+    return tool
 
+for _name, _description in TOOLS.items():
+    mcp.tool(_make_tool(_name), name=_name, description=inspect.cleandoc(_description), output_schema=None)
@@ -2,60 +2,79 @@
 Generic OpenRouter client using OpenAI SDK with async support.
 """
 
-import os
+from openai import APIStatusError, AsyncOpenAI, AuthenticationError, DefaultAsyncHttpxClient
 
-import httpx
-from openai import AsyncOpenAI
+from src.settings import SETTINGS
 
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 
 class OpenRouterClient:
     """
     Async client for OpenRouter API.
-    Validates API key on initialization.
+    Invalid API keys surface on the first chat completion; an eager
+    /auth/key round-trip can be enabled with OPENROUTER_VALIDATE_KEY=1.
     """
 
-    def __init__(self, api_key: str | None = None):
+    def __init__(self, api_key: str | None = None, validate_key: bool | None = None):
         """
         Initialize OpenRouter client.
 
         Args:
             api_key: OpenRouter API key (defaults to OPENROUTER_API_KEY env var)
+            validate_key: Validate key via /auth/key before first use
+                (defaults to OPENROUTER_VALIDATE_KEY env var)
 
         Raises:
             ValueError: If API key is not provided or invalid
         """
-        self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
+        self.api_key = api_key or SETTINGS.openrouter_api_key
         if not self.api_key:
             raise ValueError(
                 "OpenRouter API key not configured. "
                 "Set OPENROUTER_API_KEY environment variable."
             )
 
+        self.validate_key = SETTINGS.key_validation if validate_key is None else validate_key
+
         self._client: AsyncOpenAI | None = None
 
-    async def _validate_api_key(self) -> None:
-        """Validate API key via OpenRouter auth endpoint."""
-        async with httpx.AsyncClient() as http:
-            response = await http.get(
-                f"{OPENROUTER_BASE_URL}/auth/key",
-                headers={"Authorization": f"Bearer {self.api_key}"},
-            )
-            if response.status_code != 200:
-                raise ValueError(
-                    f"Invalid OpenRouter API key (status {response.status_code})"
-                )
+    async def _validate_api_key(self, client: AsyncOpenAI) -> None:
+        """
+        Validate API key via OpenRouter auth endpoint.
+
+        Reuses the OpenAI client's connection pool, so the TLS connection
+        opened here serves the subsequent completion requests.
+        """
+        try:
+            await client.get("/auth/key", cast_to=object)
+        except APIStatusError as e:
+            raise ValueError(
+                f"Invalid OpenRouter API key (status {e.status_code})"
+            ) from e
 
     async def _get_client(self) -> AsyncOpenAI:
-        """Get or create the OpenAI client, validating key on first use."""
+        """Get or create the OpenAI client, optionally validating key on first use."""
         if self._client is None:
-            await self._validate_api_key()
-            self._client = AsyncOpenAI(
+            client = AsyncOpenAI(
                 base_url=OPENROUTER_BASE_URL,
                 api_key=self.api_key,
+                # Concurrent requests share multiplexed HTTP/2 connections to OpenRouter
+                http_client=DefaultAsyncHttpxClient(http2=True),
             )
+            if self.validate_key:
+                try:
+                    await self._validate_api_key(client)
+                except BaseException:
+                    # Don't leak the connection pool on any failure (network, timeout, cancel)
+                    await client.close()
+                    raise
+            self._client = client
         return self._client
 
+    async def connect(self) -> None:
+        """Create the OpenAI client ahead of the first request."""
+        await self._get_client()
+
     async def chat_completion(
         self,
         prompt: str,
@@ -72,6 +91,9 @@ class OpenRouterClient:
 
         Returns:
             Dict with content, model, tokens, annotations (if available)
+
+        Raises:
+            ValueError: If the API key is rejected by OpenRouter
         """
         client = await self._get_client()
 
@@ -80,10 +102,13 @@ class OpenRouterClient:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
 
-        response = await client.chat.completions.create(
-            model=model,
-            messages=messages,
-        )
+        try:
+            response = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+            )
+        except AuthenticationError as e:
+            raise ValueError("Invalid OpenRouter API key") from e
 
         choice = response.choices[0]
 
@@ -3,7 +3,34 @@ Perplexity web search tools via OpenRouter.
 Provides 4 tools matching the official Perplexity MCP interface.
 """
 
+import asyncio
+import re
+from typing import NamedTuple
+
 from src.openrouter_client import OpenRouterClient
+from src.settings import SETTINGS
+
+# Inline citation marker like [1] referencing a source
+_CITE_RE = re.compile(r"\[(\d+)\]")
+
+# Fenced or inline code span (group 1), else a citation marker (group 2)
+_CODE_OR_CITE_RE = re.compile(r"(```.*?(?:```|\Z)|`[^`\n]*`)|\[(\d+)\]", re.DOTALL)
+
+# Leading list marker on a sub-question line ("1.", "2)", "-", "*")
+_LIST_MARKER_RE = re.compile(r"^\s*(?:\d+[.)]|[-*])\s*")
+
+SPLIT_QUERY_PROMPT = (
+    "Break the user's research question into at most {n} distinct, self-contained "
+    "sub-questions that together cover it. Reply with one sub-question per line, "
+    "each ending with a question mark, and nothing else."
+)
+
+
+class Source(NamedTuple):
+    """URL citation extracted from an API response."""
+
+    url: str
+    title: str
 
 
 class PerplexitySearch:
@@ -18,55 +45,100 @@ class PerplexitySearch:
     MODEL_RESEARCH = "perplexity/sonar-deep-research"
     MODEL_REASON = "perplexity/sonar-reasoning-pro"
 
-    def __init__(self, api_key: str | None = None):
+    # Upper bound on concurrent deep-research sub-queries
+    MAX_RESEARCH_FANOUT = 4
+
+    def __init__(self, api_key: str | None = None, research_fanout: int | None = None):
         """
         Initialize Perplexity search service.
 
         Args:
             api_key: OpenRouter API key (defaults to OPENROUTER_API_KEY env var)
+            research_fanout: Max sub-queries perplexity_research runs concurrently
+                (defaults to PERPLEXITY_RESEARCH_FANOUT env var, 1 disables splitting,
+                capped at MAX_RESEARCH_FANOUT)
         """
         self.client = OpenRouterClient(api_key=api_key)
+        if research_fanout is None:
+            research_fanout = SETTINGS.research_fanout
+        self.research_fanout = min(research_fanout, self.MAX_RESEARCH_FANOUT)
 
-    def _format_citations(self, annotations: list | None) -> str:
+    def _extract_sources(self, annotations: list) -> list[Source]:
         """
-        Format citation sources as markdown ordered list.
+        Extract URL citations from annotations.
 
         Args:
-            annotations: List of annotation objects from the API response
+            annotations: Non-empty list of annotation objects from the API response
+
+        Returns:
+            List of sources in citation order
+        """
+        # Annotations are either all SDK models or all plain dicts; decide once
+        if isinstance(annotations[0], dict):
+            sources = [
+                Source(uc["url"], uc.get("title") or uc["url"])
+                for ann in annotations
+                if ann.get("type") == "url_citation" and (uc := ann.get("url_citation") or {}).get("url")
+            ]
+        else:
+            sources = [
+                Source(uc.url, uc.title or uc.url)
+                for ann in annotations
+                if ann.type == "url_citation" and (uc := ann.url_citation) and uc.url
+            ]
+
+        return sources
+
+    def _format_sources(self, sources: dict[str, str]) -> str:
+        """
+        Format sources as markdown ordered list.
+
+        Args:
+            sources: Mapping of URL to title, in citation order
 
         Returns:
             Markdown formatted sources section, or empty string if no sources
         """
-        if not annotations:
+        if not sources:
             return ""
 
-        sources = []
-        for ann in annotations:
-            # Handle both dict and object formats
-            if isinstance(ann, dict):
-                ann_type = ann.get("type")
-                url_citation = ann.get("url_citation", {})
-            else:
-                ann_type = getattr(ann, "type", None)
-                url_citation = getattr(ann, "url_citation", {})
+        lines = [f"{i}. [{title}]({url})" for i, (url, title) in enumerate(sources.items(), 1)]
+        return "\n\n## Sources\n" + "\n".join(lines)
 
-            if ann_type == "url_citation":
-                # Extract URL and title
-                if isinstance(url_citation, dict):
-                    url = url_citation.get("url", "")
-                    title = url_citation.get("title", url)
-                else:
-                    url = getattr(url_citation, "url", "")
-                    title = getattr(url_citation, "title", url)
+    def _cite(self, content: str, annotations: list | None, sources: dict[str, str]) -> str:
+        """
+        Collect an answer's citations into a deduplicated sources mapping.
 
-                if url:
-                    sources.append({"url": url, "title": title})
+        Each URL is listed once, so inline markers ([1], [2], ...) are renumbered
+        to point at its position in `sources`. Code spans are left untouched so
+        indexing like arr[3] isn't mistaken for a marker. Answers without markers
+        keep their sources but skip the renumbering.
 
-        if not sources:
-            return ""
+        Args:
+            content: Answer text from the API response
+            annotations: List of annotation objects from the API response
+            sources: Mapping of URL to title, updated in place
 
-        lines = [f"{i + 1}. [{s['title']}]({s['url']})" for i, s in enumerate(sources)]
-        return "\n\n## Sources\n" + "\n".join(lines)
+        Returns:
+            Answer text with inline markers renumbered
+        """
+        if not annotations:
+            return content
+
+        numbers = {url: i for i, url in enumerate(sources, 1)}
+        renumber: dict[str, str] = {}
+        for i, (url, title) in enumerate(self._extract_sources(annotations), 1):
+            if url not in numbers:
+                sources[url] = title
+                numbers[url] = len(sources)
+            if numbers[url] != i:
+                renumber[str(i)] = str(numbers[url])
+
+        if not renumber or not _CITE_RE.search(content):
+            return content
+        return _CODE_OR_CITE_RE.sub(
+            lambda m: m[0] if m[1] else f"[{renumber.get(m[2], m[2])}]", content
+        )
 
     async def _query(self, query: str, model: str) -> str:
         """
@@ -84,8 +156,75 @@ class PerplexitySearch:
             model=model,
         )
 
-        sources_text = self._format_citations(response["annotations"])
-        return response["content"] + sources_text
+        sources: dict[str, str] = {}
+        content = self._cite(response["content"], response["annotations"], sources)
+        return content + self._format_sources(sources)
+
+    async def _split_query(self, query: str, max_parts: int) -> list[str]:
+        """
+        Split a research question into sub-questions using the fast search model.
+
+        Search models tend to add citation markers and preamble lines, so markers
+        are stripped and only lines phrased as questions are kept.
+
+        Args:
+            query: User query
+            max_parts: Maximum number of sub-questions
+
+        Returns:
+            Sub-questions, or [query] if the model didn't produce any
+        """
+        response = await self.client.chat_completion(
+            prompt=query,
+            model=self.MODEL_SEARCH,
+            system_prompt=SPLIT_QUERY_PROMPT.format(n=max_parts),
+        )
+
+        lines = (
+            _LIST_MARKER_RE.sub("", _CITE_RE.sub("", line)).strip()
+            for line in response["content"].splitlines()
+        )
+        parts = [line for line in lines if line.endswith("?")][:max_parts]
+        return parts or [query]
+
+    async def _multi_query(self, queries: list[str], model: str) -> str:
+        """
+        Query a Perplexity model with several queries concurrently and merge the answers.
+
+        Each answer becomes its own section. Inline [N] markers are renumbered
+        against a single merged sources list. A failed sub-query is reported in
+        its section while the others are kept. Failures that would affect every
+        request (e.g. an invalid API key) are raised, as is the first error
+        when no sub-query succeeds.
+
+        Args:
+            queries: Sub-queries to run
+            model: Perplexity model to use
+
+        Returns:
+            Answer sections with merged markdown sources section appended
+        """
+        results = await asyncio.gather(
+            *(self.client.chat_completion(prompt=q, model=model) for q in queries),
+            return_exceptions=True,
+        )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        for error in errors:
+            if isinstance(error, ValueError) or not isinstance(error, Exception):
+                raise error
+        if len(errors) == len(results):
+            raise errors[0]
+
+        sources: dict[str, str] = {}
+        sections = []
+        for sub_query, result in zip(queries, results):
+            if isinstance(result, BaseException):
+                content = f"_Research failed: {type(result).__name__}: {result}_"
+            else:
+                content = self._cite(result["content"], result["annotations"], sources)
+            sections.append(f"## {sub_query}\n\n{content}")
+
+        return "\n\n".join(sections) + self._format_sources(sources)
 
     async def perplexity_search(self, query: str) -> str:
         """
@@ -124,6 +263,11 @@ class PerplexitySearch:
         Returns:
             Answer text with markdown sources list appended
         """
+        if self.research_fanout > 1:
+            queries = await self._split_query(query, self.research_fanout)
+            if len(queries) > 1:
+                return await self._multi_query(queries, self.MODEL_RESEARCH)
+
         return await self._query(query, self.MODEL_RESEARCH)
 
     async def perplexity_reason(self, query: str) -> str:
@@ -139,6 +283,10 @@ class PerplexitySearch:
         """
         return await self._query(query, self.MODEL_REASON)
 
+    async def connect(self) -> None:
+        """Open the client connection ahead of the first query."""
+        await self.client.connect()
+
     async def close(self) -> None:
         """Close the client connection."""
         await self.client.close()
@@ -0,0 +1,49 @@
+"""
+Server configuration read from environment variables once at import.
+"""
+
+import os
+from dataclasses import dataclass
+
+
+def _int_env(name: str, default: int) -> int:
+    """Read an integer environment variable, failing with a clear message."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}") from None
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Typed server configuration."""
+
+    host: str
+    port: int
+    bearer_token: str | None
+    openrouter_api_key: str | None
+    key_validation: bool
+    research_fanout: int
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """
+        Build settings from environment variables.
+
+        Raises:
+            ValueError: If a numeric variable is not an integer
+        """
+        return cls(
+            host=os.getenv("MCP_HOST", "0.0.0.0"),
+            port=_int_env("MCP_PORT", 8001),
+            bearer_token=os.getenv("MCP_BEARER_TOKEN"),
+            openrouter_api_key=os.getenv("OPENROUTER_API_KEY"),
+            key_validation=os.getenv("OPENROUTER_VALIDATE_KEY") == "1",
+            research_fanout=_int_env("PERPLEXITY_RESEARCH_FANOUT", 1),
+        )
+
+
+SETTINGS = Settings.from_env()